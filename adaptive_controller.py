@@ -0,0 +1,172 @@
+import os
+import time
+import threading
+import weakref
+import config
+
+# Every live controller (one per stream), for the status API
+_controllers = weakref.WeakSet()
+_controllers_lock = threading.Lock()
+
+def inference_size(images):
+    """Model input size for a batch: the largest image side rounded up to the stride of 32."""
+    side = max(max(image.shape[:2]) for image in images)
+    return max(32, -(-side // 32) * 32)
+
+class AdaptiveController:
+    """
+    Feedback controller for inference resolution and inference interval of one stream.
+    Degrades (skip more frames, then shrink width) when processing cannot keep up with
+    the target FPS or CPU budget, and upgrades in reverse order when there is headroom.
+    """
+
+    def __init__(self, name="stream"):
+        self.name = name
+        self.enabled = config.ADAPTIVE_ENABLED
+        self.widths = sorted(set(config.ADAPTIVE_WIDTHS) | {config.DETECTION_WIDTH})
+        self.detection_width = config.DETECTION_WIDTH
+        self.frame_skip = config.FRAME_SKIP
+
+        # Latest measurements
+        self.inference_ms = 0.0
+        self.capture_fps = 0.0
+        self.busy_percent = 0.0
+        self.cpu_percent = 0.0
+
+        self.danger_until = 0
+        self.last_decision = "initial"
+        self.decisions = 0
+
+        self._lock = threading.Lock()
+        self._frames = 0
+        self._busy = 0.0
+        self._window_start = time.time()
+        self._cpu_start = time.process_time()
+        with _controllers_lock:
+            _controllers.add(self)
+
+    def get_settings(self):
+        """Returns (detection_width, frame_skip) to use for the next frame."""
+        with self._lock:
+            return self._effective_settings(time.time())
+
+    def _effective_settings(self, now):
+        if not self.enabled:
+            return config.DETECTION_WIDTH, config.FRAME_SKIP
+
+        width, skip = self.detection_width, self.frame_skip
+        # Temporarily raise fidelity while a dangerous animal is being tracked
+        if now < self.danger_until:
+            width = max(width, config.ADAPTIVE_DANGER_WIDTH)
+            skip = min(skip, config.ADAPTIVE_DANGER_FRAME_SKIP)
+        return width, skip
+
+    def frame_processed(self, busy_seconds):
+        """
+        Call once per frame with the time spent processing it (excluding waiting on the
+        camera); re-evaluates settings every update interval.
+        """
+        with self._lock:
+            self._frames += 1
+            self._busy += busy_seconds
+            now = time.time()
+            elapsed = now - self._window_start
+            if elapsed >= config.ADAPTIVE_UPDATE_INTERVAL:
+                # Measurements taken under the DANGER boost say nothing about the base settings
+                boosted = self._window_start < self.danger_until
+                self._measure(now, elapsed)
+                if boosted:
+                    self.last_decision = "danger_boost"
+                elif self.enabled:
+                    self._decide()
+
+    def record_inference(self, seconds):
+        """Feeds one measured inference duration into a moving average."""
+        with self._lock:
+            ms = seconds * 1000
+            self.inference_ms = ms if self.inference_ms == 0 else 0.8 * self.inference_ms + 0.2 * ms
+
+    def notify_danger(self):
+        """Holds high fidelity for ADAPTIVE_DANGER_HOLD seconds after a DANGER detection."""
+        with self._lock:
+            self.danger_until = time.time() + config.ADAPTIVE_DANGER_HOLD
+
+    def _measure(self, now, elapsed):
+        cpu_now = time.process_time()
+        cores = os.cpu_count() or 1
+        self.capture_fps = self._frames / elapsed
+        self.busy_percent = self._busy / elapsed * 100
+        self.cpu_percent = (cpu_now - self._cpu_start) / elapsed / cores * 100
+
+        self._frames = 0
+        self._busy = 0.0
+        self._window_start = now
+        self._cpu_start = cpu_now
+
+    def _decide(self):
+        target = config.ADAPTIVE_TARGET_FPS
+        budget = config.ADAPTIVE_CPU_BUDGET
+        # Time available for one inference if it has to fit between skipped frames
+        slot_ms = 1000.0 / target * self.frame_skip
+        idx = self.widths.index(self.detection_width)
+
+        # Low FPS only means overload if the loop is busy processing, not waiting on a slow camera
+        processing_bound = self.busy_percent > config.ADAPTIVE_BUSY_LIMIT * 100
+        overloaded = ((self.capture_fps < target * (1 - config.ADAPTIVE_FPS_TOLERANCE) and processing_bound)
+                      or self.cpu_percent > budget
+                      or self.inference_ms > slot_ms)
+        headroom = (self.busy_percent < config.ADAPTIVE_BUSY_LIMIT * config.ADAPTIVE_HEADROOM * 100
+                    and self.cpu_percent < budget * config.ADAPTIVE_HEADROOM
+                    and self.inference_ms < slot_ms * config.ADAPTIVE_HEADROOM)
+
+        decision = "hold"
+        if overloaded:
+            if self.frame_skip < config.ADAPTIVE_MAX_FRAME_SKIP:
+                self.frame_skip += 1
+                decision = "increase_frame_skip"
+            elif idx > 0:
+                self.detection_width = self.widths[idx - 1]
+                decision = "decrease_width"
+        elif headroom:
+            if idx < len(self.widths) - 1:
+                self.detection_width = self.widths[idx + 1]
+                decision = "increase_width"
+            elif self.frame_skip > 1:
+                self.frame_skip -= 1
+                decision = "decrease_frame_skip"
+
+        if decision != "hold":
+            self.decisions += 1
+            print(f"[ADAPT] {self.name} {decision}: width={self.detection_width} skip={self.frame_skip} "
+                  f"(fps={self.capture_fps:.1f}, busy={self.busy_percent:.0f}%, cpu={self.cpu_percent:.0f}%, "
+                  f"infer={self.inference_ms:.0f}ms)")
+        self.last_decision = decision
+
+    def status(self):
+        """Snapshot of measurements and current decisions for the status API."""
+        with self._lock:
+            now = time.time()
+            width, skip = self._effective_settings(now)
+            return {
+                'name': self.name,
+                'enabled': self.enabled,
+                'detection_width': width,
+                'frame_skip': skip,
+                'base_detection_width': self.detection_width,
+                'base_frame_skip': self.frame_skip,
+                'danger_boost': now < self.danger_until,
+                'inference_ms': round(self.inference_ms, 1),
+                'capture_fps': round(self.capture_fps, 1),
+                'busy_percent': round(self.busy_percent, 1),
+                'cpu_percent': round(self.cpu_percent, 1),
+                'target_fps': config.ADAPTIVE_TARGET_FPS,
+                'cpu_budget': config.ADAPTIVE_CPU_BUDGET,
+                'last_decision': self.last_decision,
+                'decisions': self.decisions
+            }
+
+def controller_status():
+    """Status of every live stream controller."""
+    with _controllers_lock:
+        controllers = list(_controllers)
+    return {'streams': [c.status() for c in controllers]}
@@ -6,6 +6,7 @@ from twilio.rest import Client
 import playsound
 import threading
 import config
+from tracing import tracer
 
 class AlertSystem:
     def __init__(self):
@@ -16,6 +17,10 @@ class AlertSystem:
         """
         Triggers the alert process: Sound + Notification (Email/SMS).
         """
+        with tracer.span("trigger_alert", label=detection_label):
+            self._trigger_alert(detection_label)
+
+    def _trigger_alert(self, detection_label):
         current_time = time.time()
         
         # 1. Play Sound (Non-blocking usually preferred, but playsound is simple)
@@ -30,10 +35,12 @@ class AlertSystem:
             print(f"[ALERT] Sending Notification for: {detection_label}...")
             
             if config.NOTIFICATION_METHOD in ['EMAIL', 'BOTH']:
-                self._send_email(detection_label)
+                with tracer.span("alert.send_email"):
+                    self._send_email(detection_label)
             
             if config.NOTIFICATION_METHOD in ['SMS', 'BOTH']:
-                self._send_sms(detection_label)
+                with tracer.span("alert.send_sms"):
+                    self._send_sms(detection_label)
                 
             self.last_notification_time = current_time
 
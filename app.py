@@ -8,17 +8,25 @@ from flask_socketio import SocketIO, emit
 from ultralytics import YOLO
 import config
 from alert_system import AlertSystem
+from adaptive_controller import AdaptiveController, controller_status, inference_size
+from roi import RoiStore
+from camera import open_capture
+from tracing import tracer, profiler
+from cascade import CascadeDetector, classify_label, extract_detections
+from frame_pool import FramePool, pool_stats
 
 app = Flask(__name__)
 socketio = SocketIO(app, cors_allowed_origins="*")
 alert_system = AlertSystem()
+roi_store = RoiStore()
 
 # Global states
 model = None
 model_type = "NONE"
+cascade = None
 
 def load_system_model():
-    global model, model_type
+    global model, model_type, cascade
     print("[INFO] Initializing Detection Engine...")
     
     # Force YOLO-World for reliability with current vocabulary
@@ -31,36 +39,52 @@ def load_system_model():
         print(f"[ERROR] Failed to load YOLO-World: {e}. Falling back to Nano.")
         model = YOLO("yolov8n.pt")
         model_type = "NANO"
+        return
 
-def process_frame(frame, send_alert=True):
-    """Detects animals in a frame without drawing on it."""
+    if config.CASCADE_ENABLED:
+        screen_path = config.CASCADE_SCREEN_MODEL
+        if not os.path.exists(screen_path):
+            screen_path = config.CASCADE_FALLBACK_SCREEN_MODEL
+        try:
+            cascade = CascadeDetector(YOLO(screen_path), model)
+            model_type = "CASCADE"
+            print(f"[SUCCESS] Cascade mode: {screen_path} screens frames, YOLO-World confirms candidates.")
+        except Exception as e:
+            print(f"[WARN] Failed to load screening model {screen_path}: {e}. Using YOLO-World only.")
+
+def process_frame(frame, send_alert=True, region_mask=None, controller=None):
+    """Detects animals in a frame without drawing on it (only inside the region mask, if given).
+    The model call alone (not alerts) is timed into the adaptive controller, if given."""
     if model is None: return []
     
-    results = model.predict(frame, conf=config.CONFIDENCE_THRESHOLD, verbose=False)
+    h, w = frame.shape[:2]
+    # Batch the bounding crops of the active zones instead of the whole frame
+    crops = region_mask.crops(frame.shape) if region_mask is not None else [(0, 0, w, h)]
+    inputs = [frame[cy1:cy2, cx1:cx2] for cx1, cy1, cx2, cy2 in crops]
+    
+    # Infer at the size of the largest crop instead of letterboxing every crop up to 640
+    imgsz = inference_size(inputs)
+    start = time.perf_counter()
+    if cascade is not None:
+        results = cascade.detect(inputs, imgsz)
+    else:
+        with tracer.span("model.predict", crops=len(inputs), imgsz=imgsz):
+            results = extract_detections(model.predict(inputs, imgsz=imgsz, conf=config.CONFIDENCE_THRESHOLD, verbose=False), model.names)
+    if controller is not None:
+        controller.record_inference(time.perf_counter() - start)
     detections = []
     
-    for result in results:
-        boxes = result.boxes
-        for box in boxes:
-            cls_id = int(box.cls[0])
-            conf = float(box.conf[0])
-            label_name = model.names[cls_id]
-            x1, y1, x2, y2 = map(int, box.xyxy[0])
-
-            # Class mapping and filtering (simplified version of the previous logic)
-            display_name = label_name
-            category = "DOMESTIC"
-            
-            if "person" in label_name or "human" in label_name:
-                display_name = "person"
-            elif label_name in config.WILD_DANGEROUS_ANIMALS:
-                category = "DANGER"
-                display_name = config.WILD_DANGEROUS_ANIMALS[label_name]
-            elif label_name in config.WILD_SAFE_ANIMALS:
-                category = "WILD"
-                display_name = config.WILD_SAFE_ANIMALS[label_name]
-            elif label_name in config.DOMESTIC_SAFE_ANIMALS:
-                display_name = config.DOMESTIC_SAFE_ANIMALS[label_name]
+    for (off_x, off_y, _, _), crop_detections in zip(crops, results):
+        for label_name, conf, (x1, y1, x2, y2) in crop_detections:
+            # Map crop coordinates back to the frame
+            x1, y1, x2, y2 = x1 + off_x, y1 + off_y, x2 + off_x, y2 + off_y
+
+            if region_mask is not None and not region_mask.contains([x1, y1, x2, y2], frame.shape):
+                continue
+
+            # Class mapping through the config categories (unlisted labels are shown as domestic)
+            display_name, category = classify_label(label_name)
+            category = category or "DOMESTIC"
 
             min_conf = config.DANGER_CONFIDENCE_MIN if category == "DANGER" else config.SAFE_CONFIDENCE_MIN
             if conf < min_conf: continue
@@ -97,71 +121,135 @@ def draw_detections(frame, detections, scale_factor=1.0):
                     cv2.FONT_HERSHEY_SIMPLEX, 0.6, color, 2)
     return frame
 
-def generate_frames():
-    cap = cv2.VideoCapture(0)
+FRAME_HEADER = b'--frame\r\nContent-Type: image/jpeg\r\n\r\n'
+FRAME_TRAILER = b'\r\n'
+
+def generate_frames(zero_copy=True):
+    """MJPEG stream; JPEG payloads are yielded as memoryviews unless zero_copy is False."""
+    cap = open_capture(config.CAMERA_SOURCE)
     if not cap.isOpened(): return
 
+    # One pool and one controller per viewer: buffers are reused every frame, and
+    # FPS/processing time are measured for this loop only
+    frame_pool = FramePool("video_feed")
+    adaptive_controller = AdaptiveController("video_feed")
     count = 0
     last_detections = []
+    last_scale = 1.0
     
-    while True:
-        success, frame = cap.read()
-        if not success: break
-        
-        count += 1
-        h, w = frame.shape[:2]
-        
-        # Determine scale factor for inference
-        scale_factor = w / config.DETECTION_WIDTH
-        
-        # Only process every Nth frame for performance
-        if count % config.FRAME_SKIP == 1:
-            # Resize frame for FASTER inference
-            small_frame = cv2.resize(frame, (config.DETECTION_WIDTH, int(h / scale_factor)))
+    # Release the capture when the viewer disconnects (generator is closed)
+    try:
+        while True:
+            with tracer.span("capture", frame=count + 1):
+                success, frame = frame_pool.read(cap)
+            if not success: break
+            
+            count += 1
+            busy_start = time.perf_counter()
+            # Pick up zones saved from the web UI while streaming
+            region_mask = roi_store.get(config.CAMERA_SOURCE)
+            detection_width, frame_skip = adaptive_controller.get_settings()
+            h, w = frame.shape[:2]
             
-            # Predict on small frame (returns list of detection objects)
-            last_detections = process_frame(small_frame, send_alert=True)
+            # Determine scale factor for inference
+            scale_factor = w / detection_width
             
-            # Emit detections to socket
-            for d in last_detections:
-                socketio.emit('detection', {k: v for k, v in d.items() if k != 'box'})
+            # Only process every Nth frame for performance
+            if (count - 1) % frame_skip == 0:
+                # Resize frame for FASTER inference
+                with tracer.span("resize", frame=count, width=detection_width):
+                    small_frame = frame_pool.resize(frame, (detection_width, int(h / scale_factor)))
+                
+                # Predict on small frame (returns list of detection objects)
+                with tracer.span("process_frame", frame=count):
+                    last_detections = process_frame(small_frame, send_alert=True, region_mask=region_mask,
+                                                    controller=adaptive_controller)
+                # Keep the scale of the frame the boxes came from, width may change before the next inference
+                last_scale = scale_factor
+                
+                # Emit detections to socket
+                with tracer.span("socketio.emit", frame=count, detections=len(last_detections)):
+                    for d in last_detections:
+                        socketio.emit('detection', {k: v for k, v in d.items() if k != 'box'})
+                        if d['type'] == 'danger':
+                            adaptive_controller.notify_danger()
 
-        # Draw detections (scaled back up) on the high-res frame
-        annotated_frame = draw_detections(frame.copy(), last_detections, scale_factor=scale_factor)
+            # Draw detections (scaled back up) in place: the capture buffer is refilled on the next read
+            with tracer.span("draw", frame=count):
+                annotated_frame = draw_detections(frame, last_detections, scale_factor=last_scale)
 
-        ret, buffer = cv2.imencode('.jpg', annotated_frame)
-        if not ret: continue
-        yield (b'--frame\r\n'
-               b'Content-Type: image/jpeg\r\n\r\n' + buffer.tobytes() + b'\r\n')
+            with tracer.span("imencode", frame=count):
+                ret, buffer = cv2.imencode('.jpg', annotated_frame)
+            adaptive_controller.frame_processed(time.perf_counter() - busy_start)
+            if not ret: continue
+            payload = memoryview(buffer).cast('B') if zero_copy else buffer.tobytes()
+            # Time until the server asks for the next frame, i.e. time spent sending to the viewer
+            with tracer.span("yield", frame=count):
+                yield FRAME_HEADER
+                yield payload
+                yield FRAME_TRAILER
+    finally:
+        cap.release()
 
 @app.route('/')
 def index():
-    return render_template('index.html', model_type=model_type)
+    return render_template('index.html', model_type=model_type, camera_id=config.CAMERA_SOURCE)
 
 @app.route('/video_feed')
 def video_feed():
-    return Response(generate_frames(), mimetype='multipart/x-mixed-replace; boundary=frame')
+    # Werkzeug's development server only accepts bytes, other WSGI servers take buffers as-is
+    zero_copy = not request.environ.get('SERVER_SOFTWARE', '').startswith('Werkzeug')
+    return Response(generate_frames(zero_copy), mimetype='multipart/x-mixed-replace; boundary=frame')
 
 @app.route('/stop_camera')
 def stop_camera():
     return jsonify({'status': 'stopped'})
 
+@app.route('/adaptive_status')
+def adaptive_status():
+    return jsonify(controller_status())
+
+@app.route('/frame_pool_stats')
+def frame_pool_stats():
+    return jsonify(pool_stats())
+
+@app.route('/cascade_status')
+def cascade_status():
+    if cascade is None:
+        return jsonify({'enabled': False})
+    return jsonify(dict(cascade.status(), enabled=True))
+
+@app.route('/roi/<camera_id>', methods=['GET', 'POST'])
+def roi_config(camera_id):
+    if request.method == 'GET':
+        return jsonify(roi_store.get(camera_id).to_dict())
+
+    try:
+        mask = roi_store.set(camera_id, request.get_json(silent=True))
+    except (ValueError, TypeError) as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(mask.to_dict())
+
 @app.route('/detect_static', methods=['POST'])
 def detect_static():
     if 'image' not in request.files: return jsonify({'error': 'No image'}), 400
     
     file = request.files['image']
-    nparr = np.frombuffer(file.read(), np.uint8)
-    frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+    with tracer.span("static.decode"):
+        nparr = np.frombuffer(file.read(), np.uint8)
+        frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
     
     # Process with alerts enabled
-    detections = process_frame(frame, send_alert=True)
+    with tracer.span("static.process_frame"):
+        detections = process_frame(frame, send_alert=True)
     
     # Draw detections for response image
-    annotated_frame = draw_detections(frame.copy(), detections)
+    with tracer.span("static.draw"):
+        annotated_frame = draw_detections(frame, detections)
     
-    _, buffer = cv2.imencode('.jpg', annotated_frame)
-    encoded_img = base64.b64encode(buffer).decode('utf-8')
+    with tracer.span("static.imencode"):
+        _, buffer = cv2.imencode('.jpg', annotated_frame)
+        encoded_img = base64.b64encode(buffer).decode('utf-8')
     
     # Remove boxes from json response for clean data
     clean_detections = [{k: v for k, v in d.items() if k != 'box'} for d in detections]
@@ -171,6 +259,52 @@ def detect_static():
         'image': f"data:image/jpeg;base64,{encoded_img}"
     })
 
+# --- Admin: tracing & profiling (disabled unless config.ADMIN_ENABLED) ---
+
+@app.before_request
+def guard_admin():
+    if request.path.startswith('/admin/') and not config.ADMIN_ENABLED:
+        return jsonify({'error': 'Admin endpoints are disabled'}), 403
+
+@app.route('/admin/trace/start', methods=['POST'])
+def trace_start():
+    tracer.start()
+    return jsonify({'tracing': True})
+
+@app.route('/admin/trace/stop', methods=['POST'])
+def trace_stop():
+    tracer.stop()
+    return jsonify({'tracing': False, 'buffered_spans': len(tracer.events)})
+
+@app.route('/admin/trace')
+def trace_export():
+    """Chrome/Perfetto trace of the last ?seconds=N (default: everything buffered)."""
+    seconds = request.args.get('seconds', type=float)
+    response = jsonify(tracer.export(seconds))
+    response.headers['Content-Disposition'] = 'attachment; filename=trace.json'
+    return response
+
+@app.route('/admin/profile/start', methods=['POST'])
+def profile_start():
+    interval = request.args.get('interval', type=float)
+    try:
+        started = profiler.start(interval)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if not started:
+        return jsonify({'error': 'Profiler already running'}), 409
+    return jsonify({'profiling': True})
+
+@app.route('/admin/profile/stop', methods=['POST'])
+def profile_stop():
+    """Stops the sampling profiler; ?format=folded returns flamegraph input as text."""
+    result = profiler.stop()
+    if result is None:
+        return jsonify({'error': 'Profiler not running'}), 409
+    if request.args.get('format') == 'folded':
+        return Response(result['folded'], mimetype='text/plain')
+    return jsonify(result)
+
 if __name__ == '__main__':
     load_system_model()
     socketio.run(app, debug=True, host='127.0.0.1', port=8080)
@@ -0,0 +1,66 @@
+import os
+import time
+import cv2
+import numpy as np
+import config
+
+class SyntheticCapture:
+    """
+    Drop-in stand-in for cv2.VideoCapture, paced to SYNTHETIC_FPS.
+    Loops a video file if one is given, otherwise draws a moving test pattern.
+    """
+
+    def __init__(self, video_path=None):
+        self.video = cv2.VideoCapture(video_path) if video_path else None
+        self.interval = 1.0 / config.SYNTHETIC_FPS
+        self.next_frame_time = time.perf_counter()
+        self.count = 0
+
+        w, h = config.SYNTHETIC_RESOLUTION
+        # Static gradient background, only the moving box and counter change per frame
+        ramp = np.linspace(0, 255, w, dtype=np.uint8)
+        self.background = np.dstack([np.tile(ramp, (h, 1)),
+                                     np.full((h, w), 96, dtype=np.uint8),
+                                     np.tile(ramp[::-1], (h, 1))])
+
+    def isOpened(self):
+        return self.video.isOpened() if self.video is not None else True
+
+    def read(self, image=None):
+        """Same contract as cv2.VideoCapture.read(): fills `image` in place if it fits."""
+        # Pace frames like a real camera would
+        delay = self.next_frame_time - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        self.next_frame_time = max(self.next_frame_time + self.interval, time.perf_counter())
+        self.count += 1
+
+        if self.video is not None:
+            ret, frame = self.video.read(image)
+            if not ret:
+                self.video.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                ret, frame = self.video.read(image)
+            return ret, frame
+
+        if image is not None and image.shape == self.background.shape:
+            frame = image
+            np.copyto(frame, self.background)
+        else:
+            frame = self.background.copy()
+        h, w = frame.shape[:2]
+        x = (self.count * 8) % (w - 120)
+        cv2.rectangle(frame, (x, h // 3), (x + 120, h // 3 + 120), (255, 255, 255), -1)
+        cv2.putText(frame, f"SYNTHETIC {self.count}", (20, 40), cv2.FONT_HERSHEY_SIMPLEX, 1.0, (255, 255, 255), 2)
+        return True, frame
+
+    def release(self):
+        if self.video is not None:
+            self.video.release()
+
+def open_capture(source):
+    """Opens a camera, a (looping) video file, or the synthetic pattern for 'synthetic'."""
+    if source == "synthetic":
+        return SyntheticCapture()
+    if isinstance(source, str) and os.path.isfile(source) and config.CAMERA_LOOP:
+        return SyntheticCapture(source)
+    return cv2.VideoCapture(source)
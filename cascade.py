@@ -0,0 +1,148 @@
+import threading
+import config
+from roi import merge_rects
+from tracing import tracer
+from adaptive_controller import inference_size
+
+def classify_label(label_name):
+    """
+    Maps a model label to (display_name, category) through the config dictionaries.
+    Accepts YOLO-World vocabulary keys ('domestic cat') as well as the short names used by
+    the custom/COCO models ('cat'). Category is None for labels outside the config lists.
+    """
+    label_name = config.LABEL_ALIASES.get(label_name, label_name)
+    if "person" in label_name or "human" in label_name:
+        return "person", "DOMESTIC"
+    for category, mapping in (("DANGER", config.WILD_DANGEROUS_ANIMALS),
+                              ("WILD", config.WILD_SAFE_ANIMALS),
+                              ("DOMESTIC", config.DOMESTIC_SAFE_ANIMALS)):
+        if label_name in mapping:
+            return mapping[label_name], category
+        if label_name in mapping.values():
+            return label_name, category
+    return label_name, None
+
+def extract_detections(results, names):
+    """Flattens ultralytics results into one list of (label_name, conf, [x1, y1, x2, y2]) per image."""
+    return [[(names[int(box.cls[0])], float(box.conf[0]), list(map(int, box.xyxy[0]))) for box in result.boxes]
+            for result in results]
+
+def _is_animal(label_name):
+    display_name, category = classify_label(label_name)
+    return category is not None and display_name != "person"
+
+def _iou(a, b):
+    ix = max(0, min(a[2], b[2]) - max(a[0], b[0]))
+    iy = max(0, min(a[3], b[3]) - max(a[1], b[1]))
+    inter = ix * iy
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union > 0 else 0.0
+
+class CascadeDetector:
+    """
+    Two-stage detector: a cheap screening model on every frame, YOLO-World only on
+    frames (or candidate crops) where the screen finds an animal-like object or is unsure.
+    """
+
+    def __init__(self, screen_model, full_model):
+        self.screen_model = screen_model
+        self.full_model = full_model
+        self._lock = threading.Lock()
+        # Counters are per detect() call, i.e. per video frame (all ROI crops of a frame together)
+        self.stats = {
+            'frames': 0,             # Frames screened
+            'stage2_skipped': 0,     # Frames where YOLO-World did not run at all
+            'stage2_frames': 0,      # Frames where YOLO-World ran on at least one full image
+            'stage2_crop_frames': 0, # Frames where YOLO-World ran on candidate crops only
+            'stage2_crops': 0,       # Total candidate crops sent to YOLO-World
+            'stage2_forced': 0       # Full-frame runs triggered by CASCADE_FORCE_INTERVAL
+        }
+
+        # A screen that cannot name every dangerous species (e.g. COCO yolov8n) may report a
+        # tiger under an unrelated label, so its unmapped hits are also cropped for YOLO-World
+        # to re-label. Animals it misses entirely are left to CASCADE_FORCE_INTERVAL.
+        screen_labels = {classify_label(name)[0] for name in screen_model.names.values()}
+        self.missing_danger = sorted(set(config.WILD_DANGEROUS_NAMES) - screen_labels)
+        if self.missing_danger:
+            print(f"[WARN] Screening model has no class for: {', '.join(self.missing_danger)}. "
+                  f"Its unmapped hits will be cropped for YOLO-World.")
+
+    def _candidates(self, dets):
+        """Screening hits worth a YOLO-World crop: animals, plus unmapped labels if the screen lacks danger classes."""
+        return [d for d in dets if _is_animal(d[0])
+                or (self.missing_danger and classify_label(d[0])[1] is None)]
+
+    def _needs_full_frame(self, dets):
+        """True if an animal-like hit is too uncertain to trust its box for a crop."""
+        return any(_is_animal(label) and conf < config.CASCADE_CANDIDATE_CONF for label, conf, _ in dets)
+
+    def detect(self, images, imgsz=None):
+        """Returns one list of (label_name, conf, box) per image, like extract_detections()."""
+        imgsz = imgsz or inference_size(images)
+        with tracer.span("cascade.screen", images=len(images)):
+            results = self.screen_model.predict(images, imgsz=imgsz, conf=config.CASCADE_UNCERTAIN_CONF, verbose=False)
+        screened = extract_detections(results, self.screen_model.names)
+
+        with self._lock:
+            self.stats['frames'] += 1
+            forced = config.CASCADE_FORCE_INTERVAL and self.stats['frames'] % config.CASCADE_FORCE_INTERVAL == 0
+
+        # Plan the second stage: (image index, x offset, y offset, input image)
+        stage2 = []
+        full_images = crop_count = 0
+        for i, (image, dets) in enumerate(zip(images, screened)):
+            candidates = self._candidates(dets)
+            if forced or self._needs_full_frame(dets) or (candidates and config.CASCADE_STAGE2_MODE == "frame"):
+                stage2.append((i, 0, 0, image))
+                full_images += 1
+            elif candidates:
+                crops = self._candidate_crops(image, candidates)
+                stage2.extend((i, x1, y1, image[y1:y2, x1:x2]) for x1, y1, x2, y2 in crops)
+                crop_count += len(crops)
+
+        with self._lock:
+            if full_images:
+                self.stats['stage2_frames'] += 1
+                if forced: self.stats['stage2_forced'] += 1
+            elif crop_count:
+                self.stats['stage2_crop_frames'] += 1
+            else:
+                self.stats['stage2_skipped'] += 1
+            self.stats['stage2_crops'] += crop_count
+
+        output = [[] for _ in images]
+        if stage2:
+            with tracer.span("cascade.full", inputs=len(stage2)):
+                # Candidate crops are sized to the largest one, not to the full frame
+                stage2_inputs = [s[3] for s in stage2]
+                results = self.full_model.predict(stage2_inputs, imgsz=inference_size(stage2_inputs),
+                                                  conf=config.CONFIDENCE_THRESHOLD, verbose=False)
+            for (i, off_x, off_y, _), dets in zip(stage2, extract_detections(results, self.full_model.names)):
+                output[i].extend((label, conf, [box[0] + off_x, box[1] + off_y, box[2] + off_x, box[3] + off_y])
+                                 for label, conf, box in dets)
+
+        # Merge: YOLO-World is the authority on species wherever it ran; other confident screening
+        # hits with a config category (e.g. persons) are kept unless YOLO-World already covers them
+        checked = {s[0] for s in stage2}
+        for i, dets in enumerate(screened):
+            full = [box for _, _, box in output[i]]
+            output[i].extend(d for d in dets if d[1] >= config.CONFIDENCE_THRESHOLD
+                             and classify_label(d[0])[1] is not None
+                             and not (i in checked and _is_animal(d[0]))
+                             and all(_iou(d[2], box) < config.CASCADE_MERGE_IOU for box in full))
+        return output
+
+    def _candidate_crops(self, image, candidates):
+        h, w = image.shape[:2]
+        rects = []
+        for _, _, (x1, y1, x2, y2) in candidates:
+            pad_x, pad_y = int((x2 - x1) * config.CASCADE_CROP_MARGIN), int((y2 - y1) * config.CASCADE_CROP_MARGIN)
+            rects.append([max(0, x1 - pad_x), max(0, y1 - pad_y), min(w, x2 + pad_x), min(h, y2 + pad_y)])
+        return merge_rects(rects)
+
+    def status(self):
+        with self._lock:
+            stats = dict(self.stats)
+        stats['skip_rate'] = round(stats['stage2_skipped'] / stats['frames'], 3) if stats['frames'] else 0.0
+        stats['mode'] = config.CASCADE_STAGE2_MODE
+        return stats
@@ -1,6 +1,10 @@
 import os
 
 # --- Application Settings ---
+CAMERA_SOURCE = 0 # Device index, video file/stream URL, or "synthetic" for a generated test pattern
+CAMERA_LOOP = True # Replay video files from the start instead of ending the stream
+SYNTHETIC_FPS = 30 # Frame rate of the synthetic/looping source
+SYNTHETIC_RESOLUTION = (1280, 720) # (width, height) of the generated test pattern
 
 # --- Class Definitions (YOLO-World Open Vocabulary) ---
 
@@ -48,6 +52,11 @@ ANIMAL_VOCABULARY = list(DOMESTIC_SAFE_ANIMALS.keys()) + \
                     list(WILD_SAFE_ANIMALS.keys()) + \
                     list(WILD_DANGEROUS_ANIMALS.keys())
 
+# Alternate spellings used by model labels (e.g. the custom dataset's 'cheeta' class)
+LABEL_ALIASES = {
+    "cheeta": "cheetah"
+}
+
 # Flat lists for simple lookup (useful for custom model)
 WILD_DANGEROUS_NAMES = list(WILD_DANGEROUS_ANIMALS.values())
 WILD_SAFE_NAMES = list(WILD_SAFE_ANIMALS.values())
@@ -61,6 +70,52 @@ SAFE_CONFIDENCE_MIN = 0.30   # Lowered from 0.40 to capture 'person' more reliab
 FRAME_SKIP = 3        # Process every 3rd frame (higher = faster but less reactive)
 DETECTION_WIDTH = 416 # Resize frame to this width for inference (lower = faster)
 
+# --- Two-Stage Cascade ---
+# A small screening model runs on every inferred frame; YOLO-World only runs where it finds
+# an animal-like object (per the category mapping above) or is uncertain.
+CASCADE_ENABLED = False
+CASCADE_SCREEN_MODEL = os.path.join("runs", "detect", "my_animal_model2", "weights", "best.pt") # Trained by train.py
+CASCADE_FALLBACK_SCREEN_MODEL = "yolov8n.pt" # Used if the custom model is missing
+CASCADE_STAGE2_MODE = "crops"   # 'crops' = YOLO-World on padded candidate crops, 'frame' = on the whole frame
+CASCADE_CANDIDATE_CONF = 0.35   # Screening confidence that counts as a confident animal candidate (crop is enough)
+CASCADE_UNCERTAIN_CONF = 0.10   # Animal-like hits between this and CANDIDATE_CONF are uncertain (full frame).
+                                # If the screen lacks some dangerous classes, its unmapped hits are cropped too.
+CASCADE_CROP_MARGIN = 0.5       # Pad candidate boxes by 50% of their size for context
+CASCADE_FORCE_INTERVAL = 15     # Run YOLO-World on the full frame every Nth screened frame (0 = never)
+CASCADE_MERGE_IOU = 0.5         # Non-animal screening boxes overlapping a YOLO-World box above this IoU are dropped
+
+# --- Adaptive Runtime Controller ---
+# Tunes DETECTION_WIDTH and FRAME_SKIP per stream at runtime from measured inference time,
+# loop FPS, processing time and process CPU load. FRAME_SKIP/DETECTION_WIDTH are the start values.
+ADAPTIVE_ENABLED = True
+ADAPTIVE_TARGET_FPS = 20          # Frame rate the live loop should hold
+ADAPTIVE_CPU_BUDGET = 75          # Max process CPU usage (% of the whole machine)
+ADAPTIVE_WIDTHS = [256, 320, 416, 512, 640] # Allowed inference widths (low -> high fidelity)
+ADAPTIVE_MAX_FRAME_SKIP = 8       # Never infer less often than every Nth frame
+ADAPTIVE_UPDATE_INTERVAL = 2.0    # Seconds between controller decisions
+ADAPTIVE_FPS_TOLERANCE = 0.10     # Allow 10% below target before degrading
+ADAPTIVE_BUSY_LIMIT = 0.85        # Low FPS only counts as overload if processing takes >85% of the loop time
+ADAPTIVE_HEADROOM = 0.70          # Upgrade only while CPU/busy time/inference are below 70% of their limits
+ADAPTIVE_DANGER_WIDTH = 640       # Min width while a DANGER track is active
+ADAPTIVE_DANGER_FRAME_SKIP = 1    # Max frame skip while a DANGER track is active
+ADAPTIVE_DANGER_HOLD = 15         # Seconds to keep high fidelity after the last DANGER hit
+
+# --- Region of Interest Masks ---
+# Per-camera polygons (normalized 0-1 coordinates) saved from the web UI or edited by hand.
+# Inference runs only on the bounding crops of the 'include' zones; detections whose
+# center falls outside them (or inside an 'exclude' zone) are discarded.
+ROI_CONFIG_PATH = "roi_config.json"
+ROI_CROP_MARGIN = 0.05      # Pad each crop by 5% of the frame so edge animals are not cut off
+ROI_MAX_CROPS = 4           # More zones than this are merged into one crop
+ROI_FULL_FRAME_RATIO = 0.8  # If the letterboxed crop batch costs over 80% of the full frame's pixels, infer on the full frame
+
+# --- Tracing & Profiling ---
+# Off by default. Enable the /admin endpoints to start/stop tracing and the sampling profiler at runtime.
+ADMIN_ENABLED = False      # Expose /admin/trace and /admin/profile endpoints
+TRACING_ENABLED = False    # Record per-frame spans from startup
+TRACE_BUFFER_SIZE = 50000  # Max spans kept in memory (oldest dropped first)
+PROFILER_INTERVAL = 0.005  # Seconds between stack samples
+
 # --- Alert Settings ---
 
 # Cooldown in seconds to prevent spamming
@@ -0,0 +1,76 @@
+import threading
+import weakref
+import cv2
+import numpy as np
+
+# Every live pool, so the server can report allocation counters across all viewers
+_pools = weakref.WeakSet()
+_pools_lock = threading.Lock()
+
+def _data_ptr(array):
+    return array.__array_interface__['data'][0]
+
+class FramePool:
+    """
+    Preallocated frame buffers for one capture loop (capture, resize, ...).
+    A slot is only (re)allocated when the requested shape changes, so after the first
+    frame a steady stream should only increase `reuses`, never `allocations`.
+    Not thread-safe: use one pool per loop/generator.
+    """
+
+    def __init__(self, name="pool"):
+        self.name = name
+        self.buffers = {}
+        self.allocations = 0
+        self.reuses = 0
+        with _pools_lock:
+            _pools.add(self)
+
+    def get(self, slot, shape, dtype=np.uint8):
+        """Returns the buffer for a slot, allocating it only if the shape/dtype changed."""
+        buf = self.buffers.get(slot)
+        if buf is None or buf.shape != tuple(shape) or buf.dtype != dtype:
+            buf = np.empty(shape, dtype=dtype)
+            self.buffers[slot] = buf
+            self.allocations += 1
+        else:
+            self.reuses += 1
+        return buf
+
+    def read(self, cap, slot="capture"):
+        """cap.read() into the pooled buffer; adopts the returned array if the backend reallocated."""
+        buf = self.buffers.get(slot)
+        ret, frame = cap.read(buf) if buf is not None else cap.read()
+        if not ret:
+            return ret, frame
+        if buf is not None and _data_ptr(frame) == _data_ptr(buf):
+            self.reuses += 1
+        else:
+            self.buffers[slot] = frame
+            self.allocations += 1
+        return ret, frame
+
+    def resize(self, frame, size, slot="resize"):
+        """cv2.resize into the pooled buffer for `size` (width, height)."""
+        w, h = size
+        dst = self.get(slot, (h, w) + frame.shape[2:], frame.dtype)
+        return cv2.resize(frame, size, dst=dst)
+
+    def stats(self):
+        return {
+            'name': self.name,
+            'allocations': self.allocations,
+            'reuses': self.reuses,
+            'pooled_mb': round(sum(b.nbytes for b in self.buffers.values()) / 2**20, 2),
+            'slots': {slot: list(buf.shape) for slot, buf in self.buffers.items()}
+        }
+
+def pool_stats():
+    """Counters of every live pool plus totals."""
+    with _pools_lock:
+        pools = [p.stats() for p in list(_pools)]
+    return {
+        'pools': pools,
+        'allocations': sum(p['allocations'] for p in pools),
+        'reuses': sum(p['reuses'] for p in pools)
+    }
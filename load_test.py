@@ -0,0 +1,310 @@
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+import subprocess
+import http.client
+import cv2
+import config
+
+# Offline load test for the Flask/SocketIO server (Linux: server CPU/RSS are read from /proc).
+# Starts app.py in a subprocess with a synthetic or looping video source, then drives
+# MJPEG viewers, SocketIO listeners and /detect_static upload clients against it.
+#
+#   python load_test.py --viewers 4 --listeners 4 --uploaders 2 --duration 30 --no-model
+
+HOST = "127.0.0.1"
+BOUNDARY = b"--frame\r\n"
+
+def percentile(values, pct):
+    if not values: return 0.0
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[idx]
+
+def latency_summary(values):
+    """p50/p95/p99/max of a list of seconds, reported in milliseconds."""
+    return {
+        'count': len(values),
+        'p50_ms': round(percentile(values, 50) * 1000, 1),
+        'p95_ms': round(percentile(values, 95) * 1000, 1),
+        'p99_ms': round(percentile(values, 99) * 1000, 1),
+        'max_ms': round(max(values) * 1000, 1) if values else 0.0
+    }
+
+# --- Server side ---
+
+class CountingAlerts:
+    """Stands in for AlertSystem so a load test never plays sounds or sends email/SMS."""
+
+    def __init__(self):
+        self.count = 0
+
+    def trigger_alert(self, detection_label):
+        self.count += 1
+
+def serve(args):
+    """Runs the app with the requested frame source (invoked as a subprocess)."""
+    config.CAMERA_SOURCE = args.source
+    import app as server
+    if not args.with_alerts:
+        # Stay offline: DANGER detections in the clip must not reach SMTP/Twilio or skew latency
+        server.alert_system = CountingAlerts()
+    if not args.no_model:
+        server.load_system_model()
+    server.socketio.run(server.app, host=HOST, port=args.port, allow_unsafe_werkzeug=True)
+
+def start_server(args):
+    cmd = [sys.executable, os.path.abspath(__file__), "--serve", "--port", str(args.port), "--source", args.source]
+    if args.no_model: cmd.append("--no-model")
+    if args.with_alerts: cmd.append("--with-alerts")
+    proc = subprocess.Popen(cmd, cwd=os.path.dirname(os.path.abspath(__file__)))
+
+    # Wait until the index page answers (model loading can take a while)
+    deadline = time.time() + args.startup_timeout
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"Server exited during startup (code {proc.returncode})")
+        try:
+            conn = http.client.HTTPConnection(HOST, args.port, timeout=2)
+            conn.request("GET", "/")
+            if conn.getresponse().status == 200:
+                return proc
+        except OSError:
+            pass
+        time.sleep(0.5)
+    proc.terminate()
+    raise RuntimeError("Server did not become ready in time")
+
+class ProcessMonitor(threading.Thread):
+    """Samples CPU% and RSS of the server process from /proc once per interval."""
+
+    def __init__(self, pid, stop, interval=1.0):
+        super().__init__(daemon=True)
+        self.pid = pid
+        self.stop = stop
+        self.interval = interval
+        self.samples = []
+
+    def _cpu_seconds(self):
+        with open(f"/proc/{self.pid}/stat") as f:
+            # Fields after the command name; utime and stime are fields 14 and 15
+            fields = f.read().rsplit(")", 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+    def _rss_mb(self):
+        with open(f"/proc/{self.pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+        return 0.0
+
+    def run(self):
+        start = time.time()
+        last_time, last_cpu = start, self._cpu_seconds()
+        while not self.stop.wait(self.interval):
+            try:
+                now, cpu = time.time(), self._cpu_seconds()
+                self.samples.append({
+                    't': round(now - start, 1),
+                    'cpu_percent': round((cpu - last_cpu) / (now - last_time) * 100, 1),
+                    'rss_mb': round(self._rss_mb(), 1)
+                })
+                last_time, last_cpu = now, cpu
+            except OSError:
+                break
+
+# --- Clients ---
+
+def mjpeg_viewer(port, stop, result):
+    """Consumes /video_feed and records time to first frame and frame inter-arrival times."""
+    result.update({'frames': 0, 'first_frame_s': None, 'intervals': [], 'error': None})
+    try:
+        start = time.perf_counter()
+        conn = http.client.HTTPConnection(HOST, port, timeout=30)
+        conn.request("GET", "/video_feed")
+        resp = conn.getresponse()
+        buf, last = b"", None
+        while not stop.is_set():
+            chunk = resp.read1(65536)
+            if not chunk: break
+            buf += chunk
+            # Every boundary after the first one completes the previous frame
+            while True:
+                idx = buf.find(BOUNDARY, 1)
+                if idx < 0: break
+                buf = buf[idx:]
+                now = time.perf_counter()
+                if last is None:
+                    result['first_frame_s'] = now - start
+                else:
+                    result['intervals'].append(now - last)
+                last = now
+                result['frames'] += 1
+        conn.close()
+    except Exception as e:
+        result['error'] = str(e)
+
+def socket_listener(port, stop, result):
+    """Listens for 'detection' events; needs the python-socketio client."""
+    result.update({'events': 0, 'connect_s': None, 'error': None})
+    try:
+        import socketio
+    except ImportError:
+        result['error'] = "python-socketio client not installed"
+        return
+
+    client = socketio.Client()
+
+    @client.on('detection')
+    def on_detection(data):
+        result['events'] += 1
+
+    try:
+        start = time.perf_counter()
+        client.connect(f"http://{HOST}:{port}")
+        result['connect_s'] = time.perf_counter() - start
+        stop.wait()
+        client.disconnect()
+    except Exception as e:
+        result['error'] = str(e)
+
+def upload_client(port, stop, image_bytes, result):
+    """Posts the same JPEG to /detect_static in a loop and records request latency."""
+    result.update({'latencies': [], 'errors': 0})
+    sep = "----loadtest"
+    body = (f"--{sep}\r\nContent-Disposition: form-data; name=\"image\"; filename=\"frame.jpg\"\r\n"
+            f"Content-Type: image/jpeg\r\n\r\n").encode() + image_bytes + f"\r\n--{sep}--\r\n".encode()
+    headers = {'Content-Type': f"multipart/form-data; boundary={sep}"}
+
+    conn = http.client.HTTPConnection(HOST, port, timeout=60)
+    while not stop.is_set():
+        try:
+            start = time.perf_counter()
+            conn.request("POST", "/detect_static", body=body, headers=headers)
+            resp = conn.getresponse()
+            resp.read()
+            if resp.status == 200:
+                result['latencies'].append(time.perf_counter() - start)
+            else:
+                result['errors'] += 1
+        except Exception:
+            result['errors'] += 1
+            conn.close()
+            conn = http.client.HTTPConnection(HOST, port, timeout=60)
+
+def sample_image(source):
+    """JPEG for the upload clients: first frame of the configured source."""
+    from camera import open_capture
+    cap = open_capture(source)
+    ok, frame = cap.read()
+    cap.release()
+    if not ok:
+        raise RuntimeError(f"Could not read a sample frame from {source}")
+    return cv2.imencode('.jpg', frame)[1].tobytes()
+
+# --- Driver ---
+
+def run_load_test(args):
+    print(f"[INFO] Starting server on port {args.port} with source '{args.source}'...")
+    server = start_server(args)
+    stop = threading.Event()
+    monitor = ProcessMonitor(server.pid, stop)
+    monitor.start()
+
+    image_bytes = sample_image(args.source) if args.uploaders else b""
+    viewers = [{} for _ in range(args.viewers)]
+    listeners = [{} for _ in range(args.listeners)]
+    uploaders = [{} for _ in range(args.uploaders)]
+    threads = [threading.Thread(target=mjpeg_viewer, args=(args.port, stop, r), daemon=True) for r in viewers]
+    threads += [threading.Thread(target=socket_listener, args=(args.port, stop, r), daemon=True) for r in listeners]
+    threads += [threading.Thread(target=upload_client, args=(args.port, stop, image_bytes, r), daemon=True) for r in uploaders]
+
+    print(f"[INFO] Running {args.viewers} viewer(s), {args.listeners} listener(s), "
+          f"{args.uploaders} uploader(s) for {args.duration}s...")
+    try:
+        for t in threads: t.start()
+        time.sleep(args.duration)
+    finally:
+        stop.set()
+        for t in threads: t.join(timeout=5)
+        server.terminate()
+        server.wait(timeout=10)
+
+    report = build_report(args, viewers, listeners, uploaders, monitor.samples)
+    print_report(report)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"[INFO] Report written to {args.json}")
+    return report
+
+def build_report(args, viewers, listeners, uploaders, samples):
+    latencies = [l for u in uploaders for l in u.get('latencies', [])]
+    intervals = [i for v in viewers for i in v.get('intervals', [])]
+    cpu = [s['cpu_percent'] for s in samples]
+    rss = [s['rss_mb'] for s in samples]
+    return {
+        'config': {'viewers': args.viewers, 'listeners': args.listeners, 'uploaders': args.uploaders,
+                   'duration_s': args.duration, 'source': args.source, 'model': not args.no_model},
+        'uploads': {
+            'throughput_rps': round(len(latencies) / args.duration, 2),
+            'errors': sum(u.get('errors', 0) for u in uploaders),
+            'latency': latency_summary(latencies)
+        },
+        'video_feed': {
+            'per_viewer_fps': [round(v.get('frames', 0) / args.duration, 2) for v in viewers],
+            'first_frame_ms': [round(v['first_frame_s'] * 1000, 1) if v.get('first_frame_s') else None for v in viewers],
+            'frame_interval': latency_summary(intervals),
+            'errors': [v['error'] for v in viewers if v.get('error')]
+        },
+        'socketio': {
+            'events_per_listener': [l.get('events', 0) for l in listeners],
+            'connect_ms': [round(l['connect_s'] * 1000, 1) if l.get('connect_s') else None for l in listeners],
+            'errors': [l['error'] for l in listeners if l.get('error')]
+        },
+        'server': {
+            'cpu_percent_avg': round(sum(cpu) / len(cpu), 1) if cpu else 0.0,
+            'cpu_percent_max': max(cpu) if cpu else 0.0,
+            'rss_mb_max': max(rss) if rss else 0.0,
+            'timeline': samples
+        }
+    }
+
+def print_report(report):
+    up, feed, sio, srv = report['uploads'], report['video_feed'], report['socketio'], report['server']
+    print("\n--- Load Test Report ---")
+    print(f"Uploads:    {up['throughput_rps']} req/s, errors={up['errors']}, latency p50/p95/p99 = "
+          f"{up['latency']['p50_ms']}/{up['latency']['p95_ms']}/{up['latency']['p99_ms']} ms")
+    print(f"Video feed: per-viewer FPS {feed['per_viewer_fps']}, frame interval p50/p95/p99 = "
+          f"{feed['frame_interval']['p50_ms']}/{feed['frame_interval']['p95_ms']}/{feed['frame_interval']['p99_ms']} ms")
+    print(f"            first frame (ms) {feed['first_frame_ms']}")
+    print(f"SocketIO:   events per listener {sio['events_per_listener']}, connect (ms) {sio['connect_ms']}")
+    print(f"Server:     CPU avg {srv['cpu_percent_avg']}% / max {srv['cpu_percent_max']}%, RSS max {srv['rss_mb_max']} MB")
+    for err in feed['errors'] + sio['errors']:
+        print(f"[WARN] {err}")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Offline load test for the WildGuard web server.")
+    parser.add_argument("--viewers", type=int, default=2, help="Concurrent /video_feed MJPEG consumers")
+    parser.add_argument("--listeners", type=int, default=2, help="Concurrent SocketIO listeners")
+    parser.add_argument("--uploaders", type=int, default=1, help="Concurrent /detect_static upload clients")
+    parser.add_argument("--duration", type=float, default=30, help="Test duration in seconds")
+    parser.add_argument("--source", default="synthetic", help="'synthetic' or a video file to loop")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--no-model", action="store_true", help="Skip model loading to measure serving overhead only")
+    parser.add_argument("--startup-timeout", type=float, default=120)
+    parser.add_argument("--with-alerts", action="store_true",
+                        help="Use the real alert system (sound, email/SMS over the network) to include its cost")
+    parser.add_argument("--json", help="Write the full report (incl. CPU/RSS timeline) to this file")
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.serve:
+        serve(args)
+    else:
+        run_load_test(args)
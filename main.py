@@ -1,12 +1,20 @@
 import cv2
 import os
+import time
 from ultralytics import YOLO
 import config
 from alert_system import AlertSystem
+from adaptive_controller import AdaptiveController, inference_size
+from roi import RoiStore
+from camera import open_capture
+from frame_pool import FramePool
 
 def main():
     # 1. Initialize Alert System
     alert_system = AlertSystem()
+    adaptive_controller = AdaptiveController("main")
+    region_mask = RoiStore().get(config.CAMERA_SOURCE)
+    frame_pool = FramePool("main")
 
     # 2. Load Model
     # 2. Load Model
@@ -37,7 +45,7 @@ def main():
             return 
 
     # 3. Initialize Video Capture
-    cap = cv2.VideoCapture(0)
+    cap = open_capture(config.CAMERA_SOURCE)
 
     if not cap.isOpened():
         print("[ERROR] Could not open video device.")
@@ -47,34 +55,47 @@ def main():
 
     count = 0
     last_detections = []
+    last_scale = 1.0
 
     while True:
-        ret, frame = cap.read()
+        ret, frame = frame_pool.read(cap)
         if not ret:
             print("[ERROR] Failed to read frame.")
             break
 
         count += 1
+        busy_start = time.perf_counter()
+        detection_width, frame_skip = adaptive_controller.get_settings()
         h, w = frame.shape[:2]
         
         # Scale for coordinate mapping
-        scale_factor = w / config.DETECTION_WIDTH
+        scale_factor = w / detection_width
 
         # 4. Inferences (Only on every Nth frame)
-        if count % config.FRAME_SKIP == 1:
+        if (count - 1) % frame_skip == 0:
             # Resize for speed
-            small_frame = cv2.resize(frame, (config.DETECTION_WIDTH, int(h / scale_factor)))
+            small_frame = frame_pool.resize(frame, (detection_width, int(h / scale_factor)))
             
-            # Predict
-            results = model(small_frame, stream=False, conf=config.CONFIDENCE_THRESHOLD, verbose=False)
+            # Predict (batched over the region-of-interest crops)
+            crops = region_mask.crops(small_frame.shape)
+            inputs = [small_frame[cy1:cy2, cx1:cx2] for cx1, cy1, cx2, cy2 in crops]
+            # Infer at the size of the largest crop instead of letterboxing every crop up to 640
+            imgsz = inference_size(inputs)
+            start = time.perf_counter()
+            results = model(inputs, stream=False, imgsz=imgsz, conf=config.CONFIDENCE_THRESHOLD, verbose=False)
+            adaptive_controller.record_inference(time.perf_counter() - start)
             
             current_detections = []
-            for result in results:
+            for (off_x, off_y, _, _), result in zip(crops, results):
                 for box in result.boxes:
                     cls_id = int(box.cls[0])
                     conf = float(box.conf[0])
                     label_name = model.names[cls_id]
                     x1, y1, x2, y2 = map(int, box.xyxy[0])
+                    x1, y1, x2, y2 = x1 + off_x, y1 + off_y, x2 + off_x, y2 + off_y
+
+                    # Ignore anything outside the monitored area
+                    if not region_mask.contains([x1, y1, x2, y2], small_frame.shape): continue
 
                     # Mapping and filtering
                     display_name = label_name
@@ -103,15 +124,17 @@ def main():
                     
                     if category == "DANGER":
                         alert_system.trigger_alert(display_name)
+                        adaptive_controller.notify_danger()
             
             last_detections = current_detections
+            last_scale = scale_factor
 
         # 5. Draw latest detections on current frame
         for det in last_detections:
             x1, y1, x2, y2 = det['box']
             # Scale back up
-            x1, y1 = int(x1 * scale_factor), int(y1 * scale_factor)
-            x2, y2 = int(x2 * scale_factor), int(y2 * scale_factor)
+            x1, y1 = int(x1 * last_scale), int(y1 * last_scale)
+            x2, y2 = int(x2 * last_scale), int(y2 * last_scale)
             
             category = det['cat']
             display_name = det['name']
@@ -127,6 +150,8 @@ def main():
             cv2.putText(frame, label_text, (x1, y1 - 10), 
                         cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
 
+        adaptive_controller.frame_processed(time.perf_counter() - busy_start)
+
         # 6. Show Frame
         cv2.imshow("Wild Animal Detection System", frame)
 
@@ -136,6 +161,8 @@ def main():
 
     cap.release()
     cv2.destroyAllWindows()
+    stats = frame_pool.stats()
+    print(f"[INFO] Frame pool: {stats['allocations']} allocations, {stats['reuses']} reuses.")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,170 @@
+import os
+import json
+import threading
+import cv2
+import numpy as np
+import config
+
+def merge_rects(rects):
+    """Merges overlapping [x1, y1, x2, y2] rectangles into their bounding boxes."""
+    rects = [list(r) for r in rects]
+    merged = True
+    while merged:
+        merged = False
+        for i in range(len(rects)):
+            for j in range(i + 1, len(rects)):
+                a, b = rects[i], rects[j]
+                if a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]:
+                    rects[i] = [min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3])]
+                    del rects[j]
+                    merged = True
+                    break
+            if merged: break
+    return rects
+
+def _stride(value):
+    return max(32, -(-int(value) // 32) * 32)
+
+def batch_cost(rects):
+    """
+    Approximate pixels the model processes for a batch of [x1, y1, x2, y2] crops inferred
+    at imgsz = largest side. Ultralytics keeps a rectangular letterbox only when all inputs
+    share one shape; mixed shapes are each padded to an imgsz x imgsz square.
+    """
+    sizes = {(x2 - x1, y2 - y1) for x1, y1, x2, y2 in rects}
+    imgsz = _stride(max(max(size) for size in sizes))
+    if len(sizes) == 1:
+        # Same-shape batch: long side scaled to imgsz, short side padded to the stride
+        size = sizes.pop()
+        return len(rects) * imgsz * _stride(min(size) * imgsz / max(size))
+    return len(rects) * imgsz * imgsz
+
+class RegionMask:
+    """
+    Include zones and exclusion zones for one camera.
+    Points are normalized (0-1) so the same mask works at any inference resolution.
+    """
+
+    def __init__(self, include=None, exclude=None):
+        self.include = include or []
+        self.exclude = exclude or []
+        self._cache = {}
+
+    @property
+    def active(self):
+        return bool(self.include or self.exclude)
+
+    def to_dict(self):
+        return {'include': self.include, 'exclude': self.exclude}
+
+    def _build(self, shape):
+        """Rasterizes the polygons and computes the inference crops for one frame size."""
+        h, w = shape[:2]
+        if self.include:
+            mask = np.zeros((h, w), dtype=np.uint8)
+            cv2.fillPoly(mask, [self._to_pixels(p, w, h) for p in self.include], 255)
+        else:
+            mask = np.full((h, w), 255, dtype=np.uint8)
+        if self.exclude:
+            cv2.fillPoly(mask, [self._to_pixels(p, w, h) for p in self.exclude], 0)
+
+        crops = self._crops(w, h)
+        self._cache[(h, w)] = (mask, crops)
+        return mask, crops
+
+    def _to_pixels(self, polygon, w, h):
+        return np.array([[round(x * (w - 1)), round(y * (h - 1))] for x, y in polygon], dtype=np.int32)
+
+    def _crops(self, w, h):
+        full = [(0, 0, w, h)]
+        if not self.include:
+            return full
+
+        pad_x, pad_y = int(w * config.ROI_CROP_MARGIN), int(h * config.ROI_CROP_MARGIN)
+        rects = []
+        for polygon in self.include:
+            x, y, rw, rh = cv2.boundingRect(self._to_pixels(polygon, w, h))
+            rects.append([max(0, x - pad_x), max(0, y - pad_y), min(w, x + rw + pad_x), min(h, y + rh + pad_y)])
+
+        # Merge overlapping crops so no pixel is inferred twice
+        rects = merge_rects(rects)
+
+        bounding = [[min(r[0] for r in rects), min(r[1] for r in rects),
+                     max(r[2] for r in rects), max(r[3] for r in rects)]]
+        if len(rects) > config.ROI_MAX_CROPS:
+            rects = bounding
+
+        # Decide on what the letterboxed batch actually costs, not on raw crop area
+        rects = min(rects, bounding, key=batch_cost)
+        if batch_cost(rects) >= batch_cost(full) * config.ROI_FULL_FRAME_RATIO:
+            return full
+        return [tuple(r) for r in rects]
+
+    def crops(self, shape):
+        """Returns the (x1, y1, x2, y2) regions to run inference on."""
+        cached = self._cache.get(tuple(shape[:2]))
+        return (cached or self._build(shape))[1]
+
+    def contains(self, box, shape):
+        """True if the center of a frame-coordinate box lies inside the active area."""
+        cached = self._cache.get(tuple(shape[:2]))
+        mask = (cached or self._build(shape))[0]
+        h, w = mask.shape
+        cx = min(max((box[0] + box[2]) // 2, 0), w - 1)
+        cy = min(max((box[1] + box[3]) // 2, 0), h - 1)
+        return bool(mask[cy, cx])
+
+class RoiStore:
+    """Loads and saves the per-camera region masks in ROI_CONFIG_PATH."""
+
+    def __init__(self, path=None):
+        self.path = path or config.ROI_CONFIG_PATH
+        self._masks = {}
+        # Shared so cameras without zones keep their cached full-frame mask
+        self._empty = RegionMask()
+        self._lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+            masks = {str(cam): RegionMask(**self._validate(zones)) for cam, zones in data.items()}
+        except (OSError, ValueError, TypeError) as e:
+            print(f"[WARN] Could not load ROI config {self.path}: {e}")
+            return
+        with self._lock:
+            self._masks = masks
+        print(f"[INFO] Loaded ROI masks for camera(s): {', '.join(masks) or 'none'}")
+
+    def get(self, camera_id):
+        with self._lock:
+            return self._masks.get(str(camera_id)) or self._empty
+
+    def set(self, camera_id, zones):
+        """Validates and stores the zones for a camera, then writes the config file."""
+        mask = RegionMask(**self._validate(zones))
+        with self._lock:
+            self._masks[str(camera_id)] = mask
+            data = {cam: m.to_dict() for cam, m in self._masks.items()}
+            with open(self.path, 'w') as f:
+                json.dump(data, f, indent=2)
+        return mask
+
+    def _validate(self, zones):
+        if not isinstance(zones, dict):
+            raise ValueError("ROI config must map 'include'/'exclude' to polygon lists")
+        clean = {}
+        for key in ('include', 'exclude'):
+            polygons = []
+            for polygon in zones.get(key) or []:
+                if len(polygon) < 3:
+                    raise ValueError(f"{key} polygon needs at least 3 points")
+                points = [[float(x), float(y)] for x, y in polygon]
+                if any(not (0 <= v <= 1) for p in points for v in p):
+                    raise ValueError(f"{key} polygon points must be normalized to 0-1")
+                polygons.append(points)
+            clean[key] = polygons
+        return clean
@@ -60,6 +60,7 @@ function controlCamera(action) {
         startMsg.className = 'log-entry';
         startMsg.innerHTML = `<em>--- Live Session Started at ${new Date().toLocaleTimeString()} ---</em>`;
         logContainer.prepend(startMsg);
+        drawRoi();
     } else {
         liveActive = false;
         streamImg.src = "";
@@ -69,6 +70,7 @@ function controlCamera(action) {
         startBtn.disabled = false;
         stopBtn.disabled = true;
         btnStatic.disabled = false;
+        if (roiDrawing) finishRoi(); else drawRoi();
         // Tell server to stop capturing if possible, but keeping it simple for now
         fetch('/stop_camera');
     }
@@ -159,3 +161,147 @@ function showEmergency(animal) {
         safetyScore.className = "stat-value safe";
     }, 5000);
 }
+
+// --- Region of Interest editor ---
+// Polygons are stored in normalized (0-1) image coordinates, matching roi_config.json.
+const roiCanvas = document.getElementById('roi-canvas');
+const roiStatus = document.getElementById('roi-status');
+const cameraId = roiCanvas.dataset.camera;
+let roi = { include: [], exclude: [] };
+let roiDrawing = null; // 'include' or 'exclude' while a polygon is being outlined
+let roiPoints = [];
+
+async function loadRoi() {
+    try {
+        const response = await fetch(`/roi/${cameraId}`);
+        roi = await response.json();
+        updateRoiStatus();
+        drawRoi();
+    } catch (err) {
+        console.error("Failed to load regions:", err);
+    }
+}
+
+function updateRoiStatus(message) {
+    if (message) {
+        roiStatus.innerText = message;
+    } else if (roi.include.length || roi.exclude.length) {
+        roiStatus.innerText = `${roi.include.length} zone(s), ${roi.exclude.length} exclusion(s) active.`;
+    } else {
+        roiStatus.innerText = "Detecting on the full frame.";
+    }
+}
+
+function startRoi(kind) {
+    if (!liveActive) {
+        alert("Start the live camera to draw regions on the feed.");
+        return;
+    }
+    if (roiDrawing) finishRoi();
+    roiDrawing = kind;
+    roiPoints = [];
+    roiCanvas.classList.add('editing');
+    updateRoiStatus(`Click to outline the ${kind === 'include' ? 'zone' : 'exclusion'}, double-click to finish.`);
+}
+
+function finishRoi() {
+    if (roiPoints.length >= 3) roi[roiDrawing].push(roiPoints);
+    roiDrawing = null;
+    roiPoints = [];
+    roiCanvas.classList.remove('editing');
+    updateRoiStatus("Unsaved changes. Press SAVE REGIONS to apply.");
+    drawRoi();
+}
+
+function clearRoi() {
+    roiDrawing = null;
+    roiPoints = [];
+    roiCanvas.classList.remove('editing');
+    roi = { include: [], exclude: [] };
+    updateRoiStatus("Unsaved changes. Press SAVE REGIONS to apply.");
+    drawRoi();
+}
+
+async function saveRoi() {
+    if (roiDrawing) finishRoi();
+    try {
+        const response = await fetch(`/roi/${cameraId}`, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify(roi)
+        });
+        const data = await response.json();
+        if (!response.ok) {
+            updateRoiStatus(`Save failed: ${data.error}`);
+            return;
+        }
+        roi = data;
+        updateRoiStatus();
+    } catch (err) {
+        console.error("Failed to save regions:", err);
+    }
+}
+
+function imageRect() {
+    // Area actually covered by the (letterboxed) stream image inside the canvas
+    const canvasRect = roiCanvas.getBoundingClientRect();
+    const imgRect = streamImg.getBoundingClientRect();
+    return {
+        x: imgRect.left - canvasRect.left,
+        y: imgRect.top - canvasRect.top,
+        w: imgRect.width,
+        h: imgRect.height
+    };
+}
+
+function drawRoi() {
+    roiCanvas.width = roiCanvas.clientWidth;
+    roiCanvas.height = roiCanvas.clientHeight;
+    const ctx = roiCanvas.getContext('2d');
+    ctx.clearRect(0, 0, roiCanvas.width, roiCanvas.height);
+    if (!liveActive) return;
+
+    const rect = imageRect();
+    const trace = (points, color, close) => {
+        if (!points.length) return;
+        ctx.beginPath();
+        points.forEach(([x, y], i) => {
+            const px = rect.x + x * rect.w, py = rect.y + y * rect.h;
+            i === 0 ? ctx.moveTo(px, py) : ctx.lineTo(px, py);
+        });
+        if (close) ctx.closePath();
+        ctx.strokeStyle = color;
+        ctx.lineWidth = 2;
+        ctx.stroke();
+        if (close) {
+            ctx.fillStyle = color + '33';
+            ctx.fill();
+        }
+    };
+
+    roi.include.forEach(p => trace(p, '#22c55e', true));
+    roi.exclude.forEach(p => trace(p, '#ef4444', true));
+    if (roiDrawing) trace(roiPoints, roiDrawing === 'include' ? '#22c55e' : '#ef4444', false);
+}
+
+roiCanvas.addEventListener('click', (e) => {
+    if (!roiDrawing) return;
+    const rect = imageRect();
+    const canvasRect = roiCanvas.getBoundingClientRect();
+    const x = Math.min(Math.max((e.clientX - canvasRect.left - rect.x) / rect.w, 0), 1);
+    const y = Math.min(Math.max((e.clientY - canvasRect.top - rect.y) / rect.h, 0), 1);
+
+    // A double-click also fires two clicks on the same spot; keep only one point
+    const last = roiPoints[roiPoints.length - 1];
+    if (last && Math.abs(last[0] - x) < 0.005 && Math.abs(last[1] - y) < 0.005) return;
+    roiPoints.push([x, y]);
+    drawRoi();
+});
+
+roiCanvas.addEventListener('dblclick', () => {
+    if (roiDrawing) finishRoi();
+});
+
+window.addEventListener('resize', drawRoi);
+streamImg.addEventListener('load', drawRoi);
+loadRoi();
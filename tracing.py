@@ -0,0 +1,149 @@
+import os
+import sys
+import time
+import threading
+from collections import deque, Counter
+from contextlib import nullcontext
+import config
+
+# Shared no-op span: with tracing disabled a span costs one attribute check
+_NOOP_SPAN = nullcontext()
+
+class _Span:
+    __slots__ = ('tracer', 'name', 'args', 'start')
+
+    def __init__(self, tracer, name, args):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter_ns()
+        thread = threading.current_thread()
+        if exc_type is not None:
+            self.args = dict(self.args, error=exc_type.__name__)
+        self.tracer.events.append((self.name, self.start, end - self.start, thread.ident, thread.name, self.args))
+        return False
+
+class Tracer:
+    """
+    Lightweight span recorder for per-frame tracing.
+    Completed spans go into a bounded ring buffer and can be exported as a
+    Chrome/Perfetto trace (chrome://tracing or ui.perfetto.dev) for a time window.
+    """
+
+    def __init__(self):
+        self.enabled = config.TRACING_ENABLED
+        self.events = deque(maxlen=config.TRACE_BUFFER_SIZE)
+        self._epoch = time.perf_counter_ns()
+
+    def span(self, name, **args):
+        if not self.enabled:
+            return _NOOP_SPAN
+        return _Span(self, name, args)
+
+    def start(self):
+        self.events.clear()
+        self.enabled = True
+
+    def stop(self):
+        self.enabled = False
+
+    def export(self, seconds=None):
+        """Chrome trace JSON of the spans that ended in the last `seconds` (all if None)."""
+        cutoff = time.perf_counter_ns() - int(seconds * 1e9) if seconds else 0
+        pid = os.getpid()
+        trace, threads = [], {}
+        for name, start, dur, tid, thread_name, args in list(self.events):
+            if start + dur < cutoff: continue
+            threads[tid] = thread_name
+            trace.append({
+                'name': name, 'ph': 'X', 'pid': pid, 'tid': tid,
+                'ts': (start - self._epoch) / 1000, 'dur': dur / 1000, 'args': args
+            })
+        for tid, thread_name in threads.items():
+            trace.append({'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': thread_name}})
+        return {'traceEvents': trace, 'displayTimeUnit': 'ms'}
+
+class SamplingProfiler:
+    """
+    On-demand statistical profiler for all threads of the running server.
+    A background thread snapshots every thread's stack each interval; the result
+    is returned as folded stacks (flamegraph format) plus the hottest functions.
+    """
+
+    def __init__(self):
+        self._thread = None
+        self._stop = threading.Event()
+        # Serializes start/stop so concurrent admin requests cannot race on _thread
+        self._lock = threading.Lock()
+        self.stacks = Counter()
+        self.samples = 0
+        self.started_at = None
+
+    @property
+    def running(self):
+        return self._thread is not None
+
+    def start(self, interval=None):
+        """Starts sampling; False if already running. Raises ValueError for an interval outside (0, 1] s."""
+        interval = config.PROFILER_INTERVAL if interval is None else interval
+        if not 0 < interval <= 1:
+            raise ValueError("interval must be between 0 and 1 second")
+        with self._lock:
+            if self.running:
+                return False
+            self.stacks = Counter()
+            self.samples = 0
+            self.started_at = time.time()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, args=(interval,), name="sampling-profiler", daemon=True)
+            self._thread.start()
+            return True
+
+    def _run(self, interval):
+        own_id = threading.get_ident()
+        while not self._stop.wait(interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for tid, frame in sys._current_frames().items():
+                if tid == own_id: continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append(names.get(tid, str(tid)))
+                self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def stop(self, top=25):
+        """Stops sampling and returns the collected profile (None if it was not running)."""
+        with self._lock:
+            if not self.running:
+                return None
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+        self_counts, total_counts = Counter(), Counter()
+        for stack, count in self.stacks.items():
+            funcs = stack.split(";")[1:]
+            if funcs: self_counts[funcs[-1]] += count
+            for func in set(funcs):
+                total_counts[func] += count
+
+        return {
+            'duration_s': round(time.time() - self.started_at, 2),
+            'samples': self.samples,
+            'top_self': self_counts.most_common(top),
+            'top_total': total_counts.most_common(top),
+            'folded': "\n".join(f"{stack} {count}" for stack, count in self.stacks.most_common())
+        }
+
+# Process-wide instances shared by the app and the alert system
+tracer = Tracer()
+profiler = SamplingProfiler()